@@ -1,17 +1,28 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-from app.verifier import verify_email, verify_bulk_emails
-import asyncio
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal
+from app.verifier import verify_email_async, verify_bulk_emails_async, iter_verify_bulk_emails
 import logging
+import os
+import orjson
 
 # =========================
 # APP CONFIG
 # =========================
+class ORJSONResponse(JSONResponse):
+    # Routes return this directly, which also skips jsonable_encoder's
+    # per-field walk over large /bulk payloads.
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+API_VERSION = "3.2.1"
+
 app = FastAPI(
     title="Bounso Email Verifier",
-    version="3.2.1",
-    description="High-accuracy SMTP verifier with timing, entropy, and ESP behavioral analysis (Railway-safe)."
+    version=API_VERSION,
+    description="High-accuracy SMTP verifier with timing, entropy, and ESP behavioral analysis (Railway-safe).",
+    default_response_class=ORJSONResponse,
 )
 
 # =========================
@@ -26,12 +37,23 @@ logger = logging.getLogger(__name__)
 # =========================
 # MODELS
 # =========================
+# "fast" stops after syntax, disposable/role and MX checks (no SMTP probe)
+VerifyMode = Literal["fast", "full"]
+
 class SingleEmailRequest(BaseModel):
     email: str
+    mode: VerifyMode = "full"
+
+MAX_BULK_EMAILS = int(os.getenv("MAX_BULK_EMAILS", "1000"))
+MAX_WORKERS_LIMIT = int(os.getenv("MAX_WORKERS_LIMIT", "100"))
 
 class BulkEmailRequest(BaseModel):
-    emails: List[str]
-    max_workers: int = 20
+    # bounds are enforced by pydantic-core while parsing, no Python validator
+    emails: List[str] = Field(max_length=MAX_BULK_EMAILS)
+    max_workers: int = Field(20, ge=1, le=MAX_WORKERS_LIMIT)
+    # /bulk/stream only: emit rows in input order instead of as they finish
+    ordered: bool = False
+    mode: VerifyMode = "full"
 
 # =========================
 # ROUTES
@@ -40,8 +62,8 @@ class BulkEmailRequest(BaseModel):
 def home():
     return {
         "message": "🚀 Bounso Email Verifier API is Live!",
-        "version": "3.2.1",
-        "endpoints": ["/verify", "/bulk"]
+        "version": API_VERSION,
+        "endpoints": ["/verify", "/bulk", "/bulk/stream"]
     }
 
 @app.post("/verify")
@@ -53,7 +75,7 @@ async def verify_single(req: SingleEmailRequest):
     logger.info(f"Verifying single email: {email}")
 
     try:
-        result = await asyncio.to_thread(verify_email, email)
+        result = await verify_email_async(email, mode=req.mode)
     except Exception as e:
         logger.error(f"Error verifying {email}: {e}")
         raise HTTPException(status_code=500, detail="Internal verification error")
@@ -67,7 +89,7 @@ async def verify_single(req: SingleEmailRequest):
         "pattern": result.get("Pattern"),
     }
 
-    return {"count": 1, "summary": summary, "details": result}
+    return ORJSONResponse({"count": 1, "summary": summary, "details": result})
 
 @app.post("/bulk")
 async def verify_bulk(req: BulkEmailRequest):
@@ -77,7 +99,7 @@ async def verify_bulk(req: BulkEmailRequest):
     logger.info(f"Bulk verification started for {len(req.emails)} emails")
 
     try:
-        results = await asyncio.to_thread(verify_bulk_emails, req.emails, req.max_workers)
+        results = await verify_bulk_emails_async(req.emails, req.max_workers, mode=req.mode)
     except Exception as e:
         logger.error(f"Bulk verification error: {e}")
         raise HTTPException(status_code=500, detail="Bulk verification failed")
@@ -95,4 +117,28 @@ async def verify_bulk(req: BulkEmailRequest):
     ]
 
     logger.info(f"Bulk verification completed: {len(results)} results")
-    return {"count": len(results), "summary": summary, "details": results}
+    return ORJSONResponse({"count": len(results), "summary": summary, "details": results})
+
+
+@app.post("/bulk/stream")
+async def verify_bulk_stream(req: BulkEmailRequest):
+    if not req.emails:
+        raise HTTPException(status_code=400, detail="No emails provided")
+
+    logger.info(f"Streaming bulk verification started for {len(req.emails)} emails")
+
+    # NDJSON: one result per line as soon as it is final, then a count line.
+    # An async generator: batches run on the event loop, same path as /bulk.
+    async def rows():
+        count = 0
+        try:
+            async for r in iter_verify_bulk_emails(req.emails, req.max_workers, ordered=req.ordered, mode=req.mode):
+                count += 1
+                yield orjson.dumps(r) + b"\n"
+        except Exception as e:
+            logger.error(f"Streaming bulk verification error: {e}")
+            yield orjson.dumps({"error": "Bulk verification failed"}) + b"\n"
+        logger.info(f"Streaming bulk verification completed: {count} results")
+        yield orjson.dumps({"count": count}) + b"\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
@@ -8,95 +8,427 @@ from __future__ import annotations
 import os
 import re
 import time
-import random
 import string
 import smtplib
 import socket
-from statistics import mean
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Tuple, Optional
+import sqlite3
+import asyncio
+import logging
+import threading
+import weakref
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import zip_longest
+from operator import attrgetter, itemgetter
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Tuple, Optional
 
 import dns.resolver
+import dns.asyncresolver
+
+try:
+    import re2 as _syntax_re  # optional: google-re2, linear-time DFA matching
+except ImportError:
+    _syntax_re = re
+
+logger = logging.getLogger(__name__)
 
 # =========================
 # RUNTIME CONFIG (ENV)
 # =========================
 DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "3"))
 DNS_LIFETIME = float(os.getenv("DNS_LIFETIME", "5"))
+DNS_CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "10000"))
+DNS_CONCURRENCY = int(os.getenv("DNS_CONCURRENCY", "500"))
+# Async MX queries still unanswered after this many seconds are re-sent to
+# the next upstream; the first answer wins (0 disables hedging).
+DNS_HEDGE_DELAY = float(os.getenv("DNS_HEDGE_DELAY", "0.3"))
 SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "6"))
-PAUSE_BETWEEN_PROBES = float(os.getenv("PROBE_PAUSE", "0.08"))
+# RCPTs per second per MX host (AIMD: halved on 4xx, +1/s back per 250).
+MX_PROBE_RATE = float(os.getenv("MX_PROBE_RATE", "25"))
 MAX_WORKERS_DEFAULT = int(os.getenv("MAX_WORKERS", "20"))
 MX_CACHE_TTL = int(os.getenv("MX_CACHE_TTL", "3600"))
+MX_NEGATIVE_TTL = int(os.getenv("MX_NEGATIVE_TTL", "300"))
+MX_CACHE_SIZE = int(os.getenv("MX_CACHE_SIZE", "20000"))
+# Expired MX answers are still served this long while a refresh runs.
+MX_STALE_TTL = int(os.getenv("MX_STALE_TTL", "3600"))
+# Optional SQLite file shared by every worker process and kept across restarts.
+MX_CACHE_PATH = os.getenv("MX_CACHE_PATH", "")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "50000"))
+MAX_PROBES_PER_SESSION = int(os.getenv("MAX_PROBES_PER_SESSION", "100"))
+SMTP_BATCH_SIZE = int(os.getenv("SMTP_BATCH_SIZE", "25"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_IDLE_TTL = float(os.getenv("SMTP_IDLE_TTL", "100"))
+ASYNC_CONCURRENCY_FACTOR = int(os.getenv("ASYNC_CONCURRENCY_FACTOR", "10"))
+MAX_CONNECTIONS_PER_MX = int(os.getenv("MAX_CONNECTIONS_PER_MX", "8"))
+# Timings whose median absolute deviation exceeds this share of the median
+# are treated as network jitter: no timing confidence is awarded.
+TIMING_NOISE_RATIO = float(os.getenv("TIMING_NOISE_RATIO", "0.5"))
+# Off by default: servers that flush pipelined replies in one packet flatten
+# the per-RCPT timing that behavioral_score relies on.
+SMTP_PIPELINING = os.getenv("SMTP_PIPELINING", "0") == "1"
+# Opt-in: answer role mailboxes (admin@, info@, ...) without DNS or SMTP.
+SKIP_ROLE_ADDRESSES = os.getenv("SKIP_ROLE_ADDRESSES", "0") == "1"
 
 HELO_DOMAIN = os.getenv("HELO_DOMAIN", "example.com")
 MAIL_FROM = os.getenv("MAIL_FROM", "verify@example.com")
+_MAIL_FROM_CMD = f"MAIL FROM:<{MAIL_FROM}>\r\n".encode("ascii")
+
+# MX host substrings per provider, in priority order (first match wins).
+MX_PROVIDERS = (
+    ("apple", ("apple.com",)),  # ✅ APPLE (ENTERPRISE DIRECTORY SMTP)
+    ("microsoft365", ("outlook", "protection")),
+    ("google", ("google.com", "aspmx")),
+    ("proofpoint", ("pphosted", "proofpoint")),
+    ("mimecast", ("mimecast",)),
+    ("barracuda", ("barracuda",)),
+    ("godaddy", ("secureserver",)),
+    ("yahoo", ("yahoodns",)),
+)
+
+# One named group per provider; each branch scans the whole host before the
+# next is tried, so list order is preserved and lastgroup names the winner.
+_MX_PROVIDER_RE = re.compile("|".join(
+    f"(?P<{name}>.*?(?:{'|'.join(map(re.escape, needles))}))"
+    for name, needles in MX_PROVIDERS
+))
+
+# Gateways whose RCPT reply code is trusted over timing analysis.
+ENTERPRISE_PROVIDERS = frozenset({"microsoft365", "proofpoint", "mimecast", "barracuda", "apple"})
+# RCPT replies treated as "recipient accepted" (greylisting 45x included).
+ACCEPT_CODES = frozenset({250, 450, 451, 452})
+
+# Enterprise-gateway verdict by RCPT reply code (see behavioral_score).
+_SMTP_VALID = {"Pattern": "smtp_valid", "Score": 99, "Status": "valid", "Deliverable": True}
+ENTERPRISE_VERDICTS = {
+    **{code: _SMTP_VALID for code in ACCEPT_CODES},
+    550: {"Pattern": "smtp_550_invalid", "Score": 10, "Status": "invalid", "Deliverable": False},
+}
+
+# Google timing override: pattern -> (floor, ceiling) clamp on the score.
+GOOGLE_SCORE_BOUNDS = {
+    "strong_delay": (90, 90),
+    "flat_pattern": (0, 40),
+}
+_GOOGLE_DEFAULT_BOUNDS = (75, 99)
+
+# Throwaway-inbox services: answered without DNS or SMTP.
+DISPOSABLE_DOMAINS = frozenset({
+    "mailinator.com", "guerrillamail.com", "guerrillamail.net", "guerrillamail.org",
+    "sharklasers.com", "grr.la", "10minutemail.com", "10minutemail.net",
+    "tempmail.com", "temp-mail.org", "temp-mail.io", "tempmailo.com",
+    "throwawaymail.com", "yopmail.com", "yopmail.fr", "yopmail.net",
+    "trashmail.com", "trashmail.de", "getnada.com", "nada.email",
+    "dispostable.com", "maildrop.cc", "mailnesia.com", "mintemail.com",
+    "mohmal.com", "emailondeck.com", "fakeinbox.com", "spamgourmet.com",
+    "mytemp.email", "tempinbox.com", "burnermail.io", "mailcatch.com",
+    "moakt.com", "tempr.email", "discard.email", "33mail.com",
+})
+# Subdomains too (e.g. alias.33mail.com): one C-level endswith over the tuple.
+_DISPOSABLE_SUFFIXES = tuple("." + d for d in sorted(DISPOSABLE_DOMAINS))
 
-EMAIL_REGEX = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+# Shared/role mailboxes; only short-circuited when SKIP_ROLE_ADDRESSES is set.
+ROLE_LOCALS = frozenset({
+    "admin", "administrator", "abuse", "billing", "contact", "help", "hello",
+    "hostmaster", "info", "jobs", "mail", "marketing", "noc", "noreply",
+    "no-reply", "office", "postmaster", "sales", "security", "support",
+    "team", "webmaster",
+})
+
+# group(1) = local part, group(2) = domain
+EMAIL_REGEX = _syntax_re.compile(r"^([A-Za-z0-9._%+-]+)@([A-Za-z0-9.-]+\.[A-Za-z]{2,})$")
+# RFC 5321 size limits, checked before the regex ever runs
+MAX_EMAIL_LENGTH = 254
+MAX_LOCAL_LENGTH = 64
 
 # =========================
 # IPV4-ONLY DNS RESOLVER (CRITICAL ON RAILWAY)
 # =========================
-_resolver = dns.resolver.Resolver(configure=False)
-_resolver.nameservers = [
-    "8.8.8.8",
-    "8.8.4.4",
-    "1.1.1.1",
-    "9.9.9.9",
+# DNS_UPSTREAM="ip1,ip2" replaces the public defaults (e.g. a local caching
+# resolver or c-ares/unbound sidecar next to the workers).
+DNS_NAMESERVERS = [
+    ns.strip() for ns in os.getenv("DNS_UPSTREAM", "8.8.8.8,8.8.4.4,1.1.1.1,9.9.9.9").split(",")
+    if ns.strip()
 ]
+
+_resolver = dns.resolver.Resolver(configure=False)
+_resolver.nameservers = list(DNS_NAMESERVERS)
 _resolver.timeout = DNS_TIMEOUT
 _resolver.lifetime = DNS_LIFETIME
+_resolver.cache = dns.resolver.LRUCache(max_size=DNS_CACHE_SIZE)
+# EDNS0 with a 1232-byte payload (DNS flag day 2020) keeps big MX/A answers
+# on UDP instead of truncating to TCP; names are absolute, so no search list.
+_resolver.use_edns(0, 0, 1232)
+_resolver.search = []
+_resolver.use_search_by_default = False
+
+# Async twin for the event loop (MX lookups); shares the answer cache.
+_aresolver = dns.asyncresolver.Resolver(configure=False)
+_aresolver.nameservers = list(DNS_NAMESERVERS)
+_aresolver.timeout = DNS_TIMEOUT
+_aresolver.lifetime = DNS_LIFETIME
+_aresolver.cache = _resolver.cache
+_aresolver.use_edns(0, 0, 1232)
+_aresolver.search = []
+_aresolver.use_search_by_default = False
+
+# Hedge twin: same settings and cache, upstream list rotated by one so its
+# first query goes to a different server than _aresolver's.
+_aresolver_alt = dns.asyncresolver.Resolver(configure=False)
+_aresolver_alt.nameservers = DNS_NAMESERVERS[1:] + DNS_NAMESERVERS[:1]
+_aresolver_alt.timeout = DNS_TIMEOUT
+_aresolver_alt.lifetime = DNS_LIFETIME
+_aresolver_alt.cache = _resolver.cache
+_aresolver_alt.use_edns(0, 0, 1232)
+_aresolver_alt.search = []
+_aresolver_alt.use_search_by_default = False
 
 # =========================
 # MX CACHE
 # =========================
+class MXLookupError(Exception):
+    """Cached negative MX answer (NXDOMAIN / no MX / SERVFAIL)."""
+
 class MXCache:
-    def __init__(self, ttl: int = 3600):
+    """Bounded LRU of MX answers (or cached MXLookupErrors), each with its
+    own expiry; shared by the event loop and sync callers' threads.
+
+    Expired positive answers are kept for ``stale_ttl`` more seconds so
+    get_stale() can serve them while one caller refreshes in the background.
+
+    With ``path`` set, entries are also written through to a SQLite file
+    that sibling processes and restarts read from on a memory miss. Disk
+    I/O never runs under the cache lock: writes go to a single writer
+    thread, and get_async() reads the file off the event loop.
+    """
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 20000, path: str = "", stale_ttl: int = 0):
         self.ttl = ttl
-        self._store: Dict[str, Tuple[float, List[str]]] = {}
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self._store: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        if path:
+            self._open_db(path)
+
+    def _open_db(self, path: str):
+        try:
+            db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        except sqlite3.Error as e:
+            logger.warning("MX cache: cannot open %s, persistence disabled: %s", path, e)
+            return
+        try:
+            # sibling workers race on this at boot; WAL is a property of the
+            # file, so losing the race is harmless
+            db.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error as e:
+            logger.info("MX cache: journal_mode=WAL not set on %s: %s", path, e)
+        try:
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS mx "
+                "(domain TEXT PRIMARY KEY, expires REAL, hosts TEXT, error TEXT)"
+            )
+            db.execute("DELETE FROM mx WHERE expires < ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning("MX cache: cannot prepare %s, persistence disabled: %s", path, e)
+            db.close()
+            return
+        self._db = db
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bounso-mx-db")
 
     def get(self, domain: str):
-        item = self._store.get(domain)
+        """Cached records, raising a cached MXLookupError; None on a miss.
+        Reads the SQLite file on a memory miss, so keep it off the event loop."""
+        now = time.time()
+        return self._unwrap(self._get_memory(domain, now) or self._load(domain, now))
+
+    async def get_async(self, domain: str):
+        """get() for the event loop: the SQLite read runs in a worker thread."""
+        now = time.time()
+        item = self._get_memory(domain, now)
+        if not item and self._db is not None:
+            item = await asyncio.to_thread(self._load, domain, now)
+        return self._unwrap(item)
+
+    def _get_memory(self, domain: str, now: float):
+        with self._lock:
+            item = self._store.get(domain)
+            if item and now > item[0]:
+                if now > item[0] + self.stale_ttl or isinstance(item[1], MXLookupError):
+                    self._store.pop(domain, None)
+                return None
+            if item:
+                self._store.move_to_end(domain)
+            return item
+
+    @staticmethod
+    def _unwrap(item):
         if not item:
             return None
-        ts, records = item
-        if time.time() - ts > self.ttl:
-            self._store.pop(domain, None)
-            return None
+        records = item[1]
+        if isinstance(records, MXLookupError):
+            raise records
         return records
 
-    def set(self, domain: str, records: List[str]):
-        self._store[domain] = (time.time(), records)
+    def get_stale(self, domain: str) -> Tuple[Optional[List[str]], bool]:
+        """Expired records still inside the stale window, or None. The first
+        caller per expiry also gets ``True`` and must call refresh_done()."""
+        now = time.time()
+        with self._lock:
+            item = self._store.get(domain)
+            if not item or isinstance(item[1], MXLookupError) or now > item[0] + self.stale_ttl:
+                return None, False
+            refresh = domain not in self._refreshing
+            self._refreshing.add(domain)
+        return item[1], refresh
+
+    def refresh_done(self, domain: str):
+        with self._lock:
+            self._refreshing.discard(domain)
+
+    def _load(self, domain: str, now: float):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT expires, hosts, error FROM mx WHERE domain = ? AND expires > ?",
+                    (domain, now),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("MX cache: read failed for %s: %s", domain, e)
+            return None
+        if not row:
+            return None
+        expires, hosts, error = row
+        item = (expires, MXLookupError(error) if error is not None else hosts.split())
+        with self._lock:
+            self._remember(domain, item)
+        return item
+
+    def set(self, domain: str, records: List[str], ttl: Optional[int] = None):
+        # ttl = the record's own DNS TTL, capped at the cache-wide ttl
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._put(domain, time.time() + ttl, records)
+
+    def set_negative(self, domain: str, reason: str, ttl: int = 300):
+        self._put(domain, time.time() + ttl, MXLookupError(reason))
+
+    def _put(self, domain: str, expires: float, value):
+        with self._lock:
+            self._remember(domain, (expires, value))
+        if self._writer is not None:
+            self._writer.submit(self._write, domain, expires, value)
+
+    def _write(self, domain: str, expires: float, value):
+        # runs on the writer thread
+        negative = isinstance(value, MXLookupError)
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO mx VALUES (?, ?, ?, ?)",
+                    (domain, expires, "" if negative else " ".join(value),
+                     str(value) if negative else None),
+                )
+        except sqlite3.Error as e:
+            logger.warning("MX cache: write failed for %s: %s", domain, e)
 
-mx_cache = MXCache(ttl=MX_CACHE_TTL)
+    def _remember(self, domain: str, item: Tuple[float, object]):
+        self._store[domain] = item
+        self._store.move_to_end(domain)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+mx_cache = MXCache(ttl=MX_CACHE_TTL, maxsize=MX_CACHE_SIZE, path=MX_CACHE_PATH, stale_ttl=MX_STALE_TTL)
+# lowest preference first; exchange breaks ties so equal-preference hosts
+# come back in the same order whatever order the resolver returned them in
+_MX_PREFERENCE = attrgetter("preference", "exchange")
+# Definitive "no mail here" answers; timeouts are not cached.
+_NEGATIVE_MX_ERRORS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers)
+
+# =========================
+# RESULT CACHE
+# =========================
+class ResultCache:
+    """Bounded TTL cache of finished probes, keyed on the lowercased email."""
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 50000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._store: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, email: str) -> Optional[dict]:
+        key = email.lower()
+        with self._lock:
+            item = self._store.get(key)
+            if not item:
+                return None
+            ts, result = item
+            if time.time() - ts > self.ttl:
+                self._store.pop(key, None)
+                return None
+            self._store.move_to_end(key)
+        return dict(result, email=email)
+
+    def set(self, result: dict):
+        # only cache definitive SMTP answers: DNS/connect failures and 4xx
+        # (421 closing, 45x greylisting) mean "try later", not a verdict
+        code = result.get("Real_Code")
+        if result.get("Reason") != "pattern_analysis" or code is None or 400 <= code < 500:
+            return
+        key = result["email"].lower()
+        with self._lock:
+            self._store[key] = (time.time(), dict(result))
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+result_cache = ResultCache(ttl=RESULT_CACHE_TTL, maxsize=RESULT_CACHE_SIZE)
 
 # =========================
 # HELPERS
 # =========================
+# byte -> [a-z0-9] lookup table, so random bytes map to a local part in C
+_LOCAL_ALPHABET = (string.ascii_lowercase + string.digits).encode()
+_LOCAL_LUT = bytes(_LOCAL_ALPHABET[b % len(_LOCAL_ALPHABET)] for b in range(256))
+
 def random_local(k: int = 8) -> str:
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=k))
+    return os.urandom(k).translate(_LOCAL_LUT).decode()
 
 def normalize_email(email: str) -> str:
     return email.strip()
 
-def detect_mx_provider(mx_host: str) -> str:
-    h = mx_host.lower()
+def match_email(email: str):
+    """EMAIL_REGEX match for ``email``, or None. Over-long input is
+    rejected by length alone, so the regex never scans it."""
+    if len(email) > MAX_EMAIL_LENGTH or email.find("@") > MAX_LOCAL_LENGTH:
+        return None
+    return EMAIL_REGEX.match(email)
 
-    # ✅ APPLE (ENTERPRISE DIRECTORY SMTP)
-    if "apple.com" in h:
-        return "apple"
+def is_disposable(domain: str) -> bool:
+    # ``domain`` is lowercased once at ingest (verify_email / _plan_bulk)
+    return domain in DISPOSABLE_DOMAINS or domain.endswith(_DISPOSABLE_SUFFIXES)
 
-    if "outlook" in h or "protection" in h:
-        return "microsoft365"
-    if "google.com" in h or "aspmx" in h:
-        return "google"
-    if "pphosted" in h or "proofpoint" in h:
-        return "proofpoint"
-    if "mimecast" in h:
-        return "mimecast"
-    if "barracuda" in h:
-        return "barracuda"
+def short_circuit_reason(local: str, domain: str) -> Optional[str]:
+    """Reason to answer without DNS/SMTP, or None. ``domain`` is lowercase."""
+    if is_disposable(domain):
+        return "disposable"
+    if SKIP_ROLE_ADDRESSES and local.lower() in ROLE_LOCALS:
+        return "role_address"
+    return None
 
-    return "unknown"
+@lru_cache(maxsize=4096)
+def detect_mx_provider(mx_host: str) -> str:
+    m = _MX_PROVIDER_RE.match(mx_host.lower())
+    return m.lastgroup if m else "unknown"
 
 # =========================
 # IPV4 RESOLUTION (SMTP SAFETY)
@@ -125,103 +457,680 @@ def resolve_ipv4_host(hostname: str) -> Optional[str]:
 
     return None
 
+async def resolve_ipv4_host_async(hostname: str) -> Optional[str]:
+    try:
+        ans = await _aresolver.resolve(hostname, "A")
+        for r in ans:
+            ip = str(r).strip()
+            if ip:
+                return ip
+    except Exception:
+        pass
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            hostname,
+            25,
+            family=socket.AF_INET,
+            type=socket.SOCK_STREAM
+        )
+        if infos:
+            return infos[0][4][0]
+    except Exception:
+        pass
+
+    return None
+
 # =========================
 # MX LOOKUP
 # =========================
 def resolve_mx(domain: str) -> List[str]:
-    cached = mx_cache.get(domain)
+    cached = mx_cache.get(domain) or _serve_stale_mx(domain)
     if cached:
         return cached
+    return _lookup_mx(domain)
 
-    answers = _resolver.resolve(domain, "MX")
-    mx_sorted = sorted(
-        [(int(r.preference), str(r.exchange).rstrip(".")) for r in answers],
-        key=lambda x: x[0]
-    )
-    mx_hosts = [h for _, h in mx_sorted]
+def _lookup_mx(domain: str) -> List[str]:
+    try:
+        answers = _resolver.resolve(domain, "MX")
+    except _NEGATIVE_MX_ERRORS as e:
+        mx_cache.set_negative(domain, str(e), ttl=MX_NEGATIVE_TTL)
+        raise
+    mx_hosts = _sorted_mx_hosts(answers)
+
+    mx_cache.set(domain, mx_hosts, ttl=answers.rrset.ttl)
+    return mx_hosts
+
+async def resolve_mx_async(domain: str) -> List[str]:
+    cached = await mx_cache.get_async(domain) or _serve_stale_mx(domain)
+    if cached:
+        return cached
+
+    try:
+        answers = await _hedged_mx_query(domain)
+    except _NEGATIVE_MX_ERRORS as e:
+        mx_cache.set_negative(domain, str(e), ttl=MX_NEGATIVE_TTL)
+        raise
+    mx_hosts = _sorted_mx_hosts(answers)
 
-    mx_cache.set(domain, mx_hosts)
+    mx_cache.set(domain, mx_hosts, ttl=answers.rrset.ttl)
     return mx_hosts
 
+async def _hedged_mx_query(domain: str):
+    """_aresolver MX query, re-sent via _aresolver_alt if it is still
+    pending after DNS_HEDGE_DELAY. The first answer wins, including a
+    definitive NXDOMAIN/NoAnswer; a transient failure waits for the other."""
+    primary = asyncio.ensure_future(_aresolver.resolve(domain, "MX"))
+    if DNS_HEDGE_DELAY <= 0 or len(DNS_NAMESERVERS) < 2:
+        return await primary
+
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=DNS_HEDGE_DELAY)
+        if not done:
+            pending.add(asyncio.ensure_future(_aresolver_alt.resolve(domain, "MX")))
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # both may land in one round: read every outcome (so none logs
+            # "exception was never retrieved") and prefer an answer
+            outcomes = [(task, task.exception()) for task in done]
+            for task, e in outcomes:
+                if e is None:
+                    return task.result()
+            for _, e in outcomes:
+                if isinstance(e, _NEGATIVE_MX_ERRORS):
+                    raise e
+            if not pending:
+                raise outcomes[0][1]
+    finally:
+        for task in pending:
+            task.cancel()
+
+# Background re-resolution of stale entries (one thread is plenty).
+_mx_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bounso-mx-refresh")
+
+def _serve_stale_mx(domain: str) -> Optional[List[str]]:
+    records, refresh = mx_cache.get_stale(domain)
+    if refresh:
+        _mx_refresher.submit(_refresh_mx, domain)
+    return records
+
+def _refresh_mx(domain: str):
+    try:
+        _lookup_mx(domain)
+    except Exception:
+        pass  # keep serving the stale answer until it ages out
+    finally:
+        mx_cache.refresh_done(domain)
+
+def _sorted_mx_hosts(answers) -> List[str]:
+    # full preference order is kept: the whole list is returned as result["MX"].
+    # Lowercased here so the provider memo, pool, rate limiter and per-MX
+    # semaphores all key one host the same way whatever casing DNS returned.
+    return [str(r.exchange).rstrip(".").lower() for r in sorted(answers, key=_MX_PREFERENCE)]
+
 # =========================
-# SMTP MULTI PROBE (ADVANCED)
+# SMTP SESSION HELPERS
 # =========================
-def smtp_multi_probe(mx: str, target_email: str, adaptive: bool = True):
-    domain = target_email.split("@")[1]
-    seq_addrs = [
-        f"{random_local()}@{domain}",
-        target_email,
-        f"{random_local()}@{domain}"
-    ]
+class _ProbeSMTP(smtplib.SMTP):
+    """smtplib.SMTP with Nagle off (probe commands are tiny and latency-timed)
+    and keepalive on (sessions are held open across a whole batch)."""
+
+    probes = 0  # RCPTs issued on this connection
+
+    def _get_socket(self, host, port, timeout):
+        sock = super()._get_socket(host, port, timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return sock
+
+# What a probe step can raise on a live session; anything else is a bug.
+# (socket.timeout is an OSError; asyncio.TimeoutError only is from 3.11 on.)
+_SMTP_ERRORS = (smtplib.SMTPException, OSError)
+_ASYNC_SMTP_ERRORS = _SMTP_ERRORS + (asyncio.TimeoutError,)
+
+def _open_session(mx_ip: str) -> smtplib.SMTP:
+    s = _ProbeSMTP(timeout=SMTP_TIMEOUT)
+    s.connect(mx_ip, 25)
+    try:
+        if not (SMTP_PIPELINING and s.ehlo(HELO_DOMAIN)[0] == 250):
+            s.helo(HELO_DOMAIN)
+    except smtplib.SMTPServerDisconnected: raise
+    except _SMTP_ERRORS: pass
+    return s
+
+def _close_session(s: Optional[smtplib.SMTP], polite: bool = False):
+    if s is None:
+        return
+    # QUIT is written but its 221 is never awaited (as _AsyncSession.close
+    # does): retiring a session costs no round trip
+    try:
+        if polite:
+            s.send("QUIT\r\n")
+    except _SMTP_ERRORS: pass
+    finally:
+        s.close()
+
+# =========================
+# SMTP CONNECTION POOL
+# =========================
+class SMTPPool:
+    """Idle, already-greeted SMTP sessions per MX host, reused across
+    verifications. A session is handed back only if its last probe ended
+    cleanly and it is under MAX_PROBES_PER_SESSION RCPTs.
+
+    Each host's idle list is a LIFO stack (hottest session first); sessions
+    idle for longer than ``idle_ttl`` are dropped rather than reused, since
+    servers time out quiet connections on their side anyway. Hosts that are
+    never acquired again are swept by reap(), run from release() at most
+    once per ``idle_ttl``.
+    """
+
+    def __init__(self, max_idle_per_host: int = 4, idle_ttl: float = 100):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_ttl = idle_ttl
+        self._idle: Dict[str, List[Tuple[float, smtplib.SMTP]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._next_reap = time.monotonic() + idle_ttl
+
+    def acquire(self, mx: str, mx_ip: str) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                stale = self._expire(mx)
+                idle = self._idle.get(mx)
+                s = idle.pop()[1] if idle else None
+            for old in stale:
+                _close_session(old)
+            if s is None:
+                return _open_session(mx_ip)
+            try:
+                s.rset()
+                return s
+            except _SMTP_ERRORS:
+                _close_session(s)
+
+    def release(self, mx: str, s: smtplib.SMTP, healthy: bool = True):
+        if time.monotonic() >= self._next_reap:
+            self.reap()
+        if healthy and s.probes < MAX_PROBES_PER_SESSION:
+            with self._lock:
+                idle = self._idle[mx]
+                if len(idle) < self.max_idle_per_host:
+                    idle.append((time.monotonic(), s))
+                    return
+        _close_session(s, polite=healthy)
+
+    def reap(self):
+        """Close sessions idle past ``idle_ttl`` on every host."""
+        with self._lock:
+            self._next_reap = time.monotonic() + self.idle_ttl
+            stale = [s for mx in list(self._idle) for s in self._expire(mx)]
+            for mx in [mx for mx, idle in self._idle.items() if not idle]:
+                del self._idle[mx]
+        for s in stale:
+            _close_session(s)
+
+    def _expire(self, mx: str) -> List[smtplib.SMTP]:
+        # called with the lock held
+        return _take_stale(self._idle.get(mx), self.idle_ttl)
+
+def _take_stale(idle, idle_ttl: float) -> list:
+    """Pop and return the sessions idle past ``idle_ttl`` from a pool's
+    (released_at, session) stack; the oldest sit at the bottom."""
+    if not idle:
+        return []
+    cutoff = time.monotonic() - idle_ttl
+    n = 0
+    while n < len(idle) and idle[n][0] < cutoff:
+        n += 1
+    stale = [s for _, s in idle[:n]]
+    del idle[:n]
+    return stale
+
+smtp_pool = SMTPPool(max_idle_per_host=SMTP_POOL_SIZE, idle_ttl=SMTP_IDLE_TTL)
+
+# =========================
+# PER-MX PROBE RATE (AIMD TOKEN BUCKET)
+# =========================
+# Transient "slow down" replies that shrink a host's rate.
+_BACKOFF_CODES = frozenset({421, 450, 451, 452})
+
+class MXRateLimiter:
+    """Token bucket per MX host shared by every session to that host.
+    Each RCPT takes a token; 4xx replies halve the host's rate and empty
+    the bucket (so the next RCPT pauses), and every 250 adds 1/s back, up
+    to the configured rate. 2xx/5xx replies never cause a pause by
+    themselves while tokens remain."""
+
+    def __init__(self, rate: float = 25.0, min_rate: float = 1.0):
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self._buckets: Dict[str, List[float]] = {}  # mx -> [rate, tokens, ts]
+        self._lock = threading.Lock()
+
+    def reserve(self, mx: str) -> float:
+        """Take one token; return the seconds to wait before using it."""
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(mx)
+            if b is None:
+                b = self._buckets[mx] = [self.rate, self.rate, now]
+            rate, tokens, ts = b
+            tokens = min(rate, tokens + (now - ts) * rate) - 1
+            b[1], b[2] = tokens, now
+        return -tokens / rate if tokens < 0 else 0.0
+
+    def feedback(self, mx: str, code: Optional[int]):
+        with self._lock:
+            b = self._buckets.get(mx)
+            if b is None or code is None:
+                return
+            if code in _BACKOFF_CODES:
+                b[0] = max(self.min_rate, b[0] / 2)
+                b[1] = min(b[1], 0.0)
+            elif code == 250:
+                b[0] = min(self.rate, b[0] + 1)
+
+mx_rate = MXRateLimiter(rate=MX_PROBE_RATE)
+
+def _session_ok(seq) -> bool:
+    # 421 = server is closing the channel; don't hand that session back
+    return all(code != 421 for _, code, _ in seq)
+
+def _timed_rcpt(s: smtplib.SMTP, mx: str, addr: str):
+    wait = mx_rate.reserve(mx)
+    if wait:
+        time.sleep(wait)
+    start = time.perf_counter()
+    try: code, _ = s.rcpt(addr)
+    except smtplib.SMTPServerDisconnected: raise
+    except _SMTP_ERRORS: code = None
+    elapsed = round((time.perf_counter() - start) * 1000, 2)
+    mx_rate.feedback(mx, code)
+    return addr, code, elapsed
+
+def _pipelined_sequence(s: smtplib.SMTP, mx: str, addrs: List[str], reset: bool = False):
+    """RFC 2920: write [RSET +] MAIL FROM + every RCPT at once, then read
+    the replies.
+
+    The MAIL reply absorbs the network round trip, so each RCPT latency is
+    the gap between consecutive replies (server-side processing time).
+    Any error leaves the reply stream out of sync and is propagated.
+    """
+    wait = max(mx_rate.reserve(mx) for _ in addrs)
+    if wait:
+        time.sleep(wait)
+    s.send((b"RSET\r\n" if reset else b"")
+           + _MAIL_FROM_CMD
+           + b"".join(b"RCPT TO:<%s>\r\n" % a.encode("ascii") for a in addrs))
+    if reset:
+        s.getreply()
+    s.getreply()
+
     out = []
+    last = time.perf_counter()
+    for addr in addrs:
+        code, _ = s.getreply()
+        now = time.perf_counter()
+        out.append((addr, code, round((now - last) * 1000, 2)))
+        mx_rate.feedback(mx, code)
+        last = now
+    return out
+
+def _probe_sequence(s: smtplib.SMTP, mx: str, target_email: str, adaptive: bool = True,
+                    reset: bool = False, domain: Optional[str] = None):
+    """Run the fake / real / fake RCPT sequence on an already-open session,
+    RSETting the previous transaction first when ``reset`` is set. RCPTs
+    are paced by mx_rate.
+
+    SMTPServerDisconnected is propagated so batch callers can reconnect.
+    """
+    domain = domain or target_email.rpartition("@")[2]
+
+    if SMTP_PIPELINING and s.has_extn("pipelining"):
+        return _pipelined_sequence(s, mx, [
+            f"{random_local()}@{domain}",
+            target_email,
+            f"{random_local()}@{domain}",
+        ], reset=reset)
+
+    if reset:
+        s.rset()
+
+    try: s.mail(MAIL_FROM)
+    except smtplib.SMTPServerDisconnected: raise
+    except _SMTP_ERRORS: pass
+
+    fake1 = _timed_rcpt(s, mx, f"{random_local()}@{domain}")
+    real = _timed_rcpt(s, mx, target_email)
+
+    # adaptive: an accepted real RCPT that is clearly slower needs no fake 2
+    if adaptive and real[1] in ACCEPT_CODES and abs(real[2] - fake1[2]) > 60:
+        return [fake1, real]
 
+    return [fake1, real, _timed_rcpt(s, mx, f"{random_local()}@{domain}")]
+
+# =========================
+# SMTP MULTI PROBE (ADVANCED)
+# =========================
+def smtp_multi_probe(mx: str, target_email: str, adaptive: bool = True, domain: Optional[str] = None):
     mx_ip = resolve_ipv4_host(mx)
     if not mx_ip:
         return [("__connect__", None, None)]
 
     try:
-        s = smtplib.SMTP(timeout=SMTP_TIMEOUT)
-        s.connect(mx_ip, 25)
+        s = smtp_pool.acquire(mx, mx_ip)
+    except _SMTP_ERRORS:
+        return [("__connect__", None, None)]
 
-        try: s.helo(HELO_DOMAIN)
-        except: pass
-        try: s.mail(MAIL_FROM)
-        except: pass
+    try:
+        out = _probe_sequence(s, mx, target_email, adaptive, domain=domain)
+    except _SMTP_ERRORS:
+        smtp_pool.release(mx, s, healthy=False)
+        return [("__connect__", None, None)]
 
-        # Fake 1
-        start = time.perf_counter()
-        try: code1, _ = s.rcpt(seq_addrs[0])
-        except: code1 = None
-        t1 = round((time.perf_counter() - start) * 1000, 2)
-        out.append((seq_addrs[0], code1, t1))
-        time.sleep(PAUSE_BETWEEN_PROBES)
+    s.probes += len(out)
+    smtp_pool.release(mx, s, healthy=_session_ok(out))
+    return out
+
+# =========================
+# ASYNC SMTP PROBE (ASYNCIO STREAMS)
+# =========================
+# Per event loop, per MX: caps concurrent probe connections to one host.
+_mx_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+def _mx_semaphore(mx: str) -> asyncio.Semaphore:
+    per_loop = _mx_semaphores.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(mx)
+    if sem is None:
+        sem = per_loop[mx] = asyncio.Semaphore(MAX_CONNECTIONS_PER_MX)
+    return sem
+
+class _AsyncSession:
+    """Bare-bones SMTP client on asyncio streams; only reply codes are parsed
+    (plus the EHLO keywords when SMTP_PIPELINING is on). asyncio already
+    sets TCP_NODELAY; keepalive is turned on as in _ProbeSMTP."""
+
+    probes = 0  # RCPTs issued on this connection
+    pipelining = False  # server advertised PIPELINING in its EHLO reply
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
 
-        # Real
+    @classmethod
+    async def open(cls, mx_ip: str) -> "_AsyncSession":
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(mx_ip, 25), SMTP_TIMEOUT)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        session = cls(reader, writer)
+        try:
+            await session.reply()
+            await session.greet()
+        except BaseException:
+            session.close(polite=False)
+            raise
+        return session
+
+    async def greet(self):
+        if SMTP_PIPELINING:
+            lines: List[bytes] = []
+            if await self.command(f"EHLO {HELO_DOMAIN}", lines) == 250:
+                self.pipelining = any(l[4:].strip().upper() == b"PIPELINING" for l in lines)
+                return
+        await self.command(f"HELO {HELO_DOMAIN}")
+
+    async def reply(self, lines: Optional[List[bytes]] = None) -> int:
+        """Read one (possibly multi-line) reply and return only its code;
+        the raw lines are appended to ``lines`` when given."""
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), SMTP_TIMEOUT)
+            except ValueError as e:  # line over the stream limit
+                raise smtplib.SMTPException(f"oversized reply: {e}") from e
+            if not line:
+                raise ConnectionError("server closed the connection")
+            if not line[:3].isdigit():
+                raise smtplib.SMTPException(f"malformed reply: {line[:40]!r}")
+            if lines is not None:
+                lines.append(line)
+            if line[3:4] != b"-":
+                return int(line[:3])
+
+    async def command(self, line: str, lines: Optional[List[bytes]] = None) -> int:
+        self.writer.write(line.encode() + b"\r\n")
+        return await self.reply(lines)
+
+    async def timed_rcpt(self, mx: str, addr: str):
+        wait = mx_rate.reserve(mx)
+        if wait:
+            await asyncio.sleep(wait)
         start = time.perf_counter()
-        try: code2, _ = s.rcpt(seq_addrs[1])
-        except: code2 = None
-        t2 = round((time.perf_counter() - start) * 1000, 2)
-        out.append((seq_addrs[1], code2, t2))
-
-        do_fake2 = True
-        if adaptive and code2 in (250, 450, 451, 452) and abs(t2 - t1) > 60:
-            do_fake2 = False
-
-        if do_fake2:
-            time.sleep(PAUSE_BETWEEN_PROBES)
-            start = time.perf_counter()
-            try: code3, _ = s.rcpt(seq_addrs[2])
-            except: code3 = None
-            t3 = round((time.perf_counter() - start) * 1000, 2)
-            out.append((seq_addrs[2], code3, t3))
-
-        try: s.quit()
-        except: pass
+        code = await self.command(f"RCPT TO:<{addr}>")
+        elapsed = round((time.perf_counter() - start) * 1000, 2)
+        self.probes += 1
+        mx_rate.feedback(mx, code)
+        return addr, code, elapsed
 
-    except Exception:
-        out.append(("__connect__", None, None))
+    def close(self, polite: bool = True):
+        try:
+            if polite:
+                self.writer.write(b"QUIT\r\n")
+            self.writer.close()
+        except OSError:
+            pass
+
+class AsyncSMTPPool:
+    """SMTPPool for _AsyncSession: idle, greeted sessions per event loop and
+    MX host, reused across verifications on that loop (streams belong to
+    the loop that opened them). Same LIFO stacks, idle TTL, RSET check on
+    reuse and reap() sweep as SMTPPool; no lock, since each loop's stacks
+    are only touched from that loop."""
+
+    def __init__(self, max_idle_per_host: int = 4, idle_ttl: float = 100):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_ttl = idle_ttl
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, list]]" = weakref.WeakKeyDictionary()
+        self._next_reap = time.monotonic() + idle_ttl
+
+    def _hosts(self) -> Dict[str, List[Tuple[float, _AsyncSession]]]:
+        return self._loops.setdefault(asyncio.get_running_loop(), defaultdict(list))
+
+    async def acquire(self, mx: str, mx_ip: str) -> _AsyncSession:
+        hosts = self._hosts()
+        for old in _take_stale(hosts.get(mx), self.idle_ttl):
+            old.close()
+        idle = hosts.get(mx)
+        while idle:
+            session = idle.pop()[1]
+            try:
+                if await session.command("RSET") == 250:
+                    return session
+            except _ASYNC_SMTP_ERRORS:
+                pass
+            session.close(polite=False)
+        return await _AsyncSession.open(mx_ip)
+
+    def release(self, mx: str, session: _AsyncSession, healthy: bool = True):
+        if time.monotonic() >= self._next_reap:
+            self.reap()
+        if healthy and session.probes < MAX_PROBES_PER_SESSION:
+            idle = self._hosts()[mx]
+            if len(idle) < self.max_idle_per_host:
+                idle.append((time.monotonic(), session))
+                return
+        session.close(polite=healthy)
+
+    def reap(self):
+        """Close sessions idle past ``idle_ttl`` on every host of this loop."""
+        self._next_reap = time.monotonic() + self.idle_ttl
+        hosts = self._hosts()
+        for mx in list(hosts):
+            for session in _take_stale(hosts[mx], self.idle_ttl):
+                session.close()
+            if not hosts[mx]:
+                del hosts[mx]
+
+    def close_all(self):
+        """Close every idle session of the running loop; call before the
+        loop itself is closed (asyncio.run wrappers)."""
+        for idle in self._hosts().values():
+            for _, session in idle:
+                session.close()
+        self._loops.pop(asyncio.get_running_loop(), None)
+
+async_smtp_pool = AsyncSMTPPool(max_idle_per_host=SMTP_POOL_SIZE, idle_ttl=SMTP_IDLE_TTL)
+
+async def _async_pipelined_sequence(session: _AsyncSession, mx: str, addrs: List[str],
+                                    reset: bool = False):
+    """Async twin of _pipelined_sequence: one write, then the replies."""
+    wait = max(mx_rate.reserve(mx) for _ in addrs)
+    if wait:
+        await asyncio.sleep(wait)
+    session.writer.write((b"RSET\r\n" if reset else b"")
+                         + _MAIL_FROM_CMD
+                         + b"".join(b"RCPT TO:<%s>\r\n" % a.encode("ascii") for a in addrs))
+    if reset:
+        await session.reply()
+    await session.reply()
+
+    out = []
+    last = time.perf_counter()
+    for addr in addrs:
+        code = await session.reply()
+        now = time.perf_counter()
+        out.append((addr, code, round((now - last) * 1000, 2)))
+        session.probes += 1
+        mx_rate.feedback(mx, code)
+        last = now
+    return out
+
+async def _async_probe_sequence(session: _AsyncSession, mx: str, target_email: str,
+                                adaptive: bool = True, reset: bool = False,
+                                domain: Optional[str] = None):
+    """Async twin of _probe_sequence. Commands go one at a time because the
+    per-RCPT round trip is the timing signal, unless SMTP_PIPELINING is on
+    and the server offered it."""
+    domain = domain or target_email.rpartition("@")[2]
+
+    if SMTP_PIPELINING and session.pipelining:
+        return await _async_pipelined_sequence(session, mx, [
+            f"{random_local()}@{domain}",
+            target_email,
+            f"{random_local()}@{domain}",
+        ], reset=reset)
+
+    if reset:
+        await session.command("RSET")
+    await session.command(f"MAIL FROM:<{MAIL_FROM}>")
+
+    fake1 = await session.timed_rcpt(mx, f"{random_local()}@{domain}")
+    real = await session.timed_rcpt(mx, target_email)
+
+    # adaptive: an accepted real RCPT that is clearly slower needs no fake 2
+    if adaptive and real[1] in ACCEPT_CODES and abs(real[2] - fake1[2]) > 60:
+        return [fake1, real]
+
+    return [fake1, real, await session.timed_rcpt(mx, f"{random_local()}@{domain}")]
+
+async def smtp_multi_probe_async(mx: str, target_email: str, adaptive: bool = True,
+                                 domain: Optional[str] = None):
+    """Same probe as smtp_multi_probe on a pooled asyncio stream session."""
+    mx_ip = await resolve_ipv4_host_async(mx)
+    if not mx_ip:
+        return [("__connect__", None, None)]
+
+    async with _mx_semaphore(mx):
+        try:
+            session = await async_smtp_pool.acquire(mx, mx_ip)
+        except _ASYNC_SMTP_ERRORS:
+            return [("__connect__", None, None)]
+
+        try:
+            out = await _async_probe_sequence(session, mx, target_email, adaptive, domain=domain)
+        except _ASYNC_SMTP_ERRORS:
+            async_smtp_pool.release(mx, session, healthy=False)
+            return [("__connect__", None, None)]
+
+        async_smtp_pool.release(mx, session, healthy=_session_ok(out))
+    return out
+
+async def smtp_batch_probe_async(mx: str, emails: List[str], adaptive: bool = True) -> Dict[str, list]:
+    """Probe many addresses that share an MX over one pooled stream session.
+
+    The session is RSET between addresses and swapped for a fresh one every
+    MAX_PROBES_PER_SESSION RCPTs (or after a disconnect) so per-connection
+    rate limits are not tripped; it goes back to async_smtp_pool at the end.
+    """
+    mx_ip = await resolve_ipv4_host_async(mx)
+    if not mx_ip:
+        return {e: [("__connect__", None, None)] for e in emails}
+
+    out: Dict[str, list] = {}
+    session: Optional[_AsyncSession] = None
+
+    async with _mx_semaphore(mx):
+        for email in emails:
+            seq = [("__connect__", None, None)]
+            for _ in range(2):
+                try:
+                    reused = session is not None and session.probes < MAX_PROBES_PER_SESSION
+                    if not reused:
+                        if session is not None:
+                            async_smtp_pool.release(mx, session)
+                        session = None
+                        session = await async_smtp_pool.acquire(mx, mx_ip)
+                    seq = await _async_probe_sequence(session, mx, email, adaptive, reset=reused)
+                    if not _session_ok(seq):
+                        async_smtp_pool.release(mx, session, healthy=False)
+                        session = None
+                    break
+                except _ASYNC_SMTP_ERRORS:
+                    if session is not None:
+                        async_smtp_pool.release(mx, session, healthy=False)
+                    session = None
+            out[email] = seq
+
+        if session is not None:
+            async_smtp_pool.release(mx, session)
 
     return out
 
 # =========================
 # TIMING ANALYSIS (ADVANCED)
 # =========================
+# Timing confidence by delta (ms): above 10 / 40 / 80 / 120 earns the next step.
+_DELTA_BINS = (10, 40, 80, 120)
+_DELTA_CONF = (0.0, 0.06, 0.12, 0.18, 0.25)
+
 def analyze_timing(seq):
     times = [t for _, _, t in seq if isinstance(t, (int, float))]
-    codes = [str(c) for _, c, _ in seq if c is not None]
 
     if not times:
         return 0.0, 0, 1, None
 
-    delta = int(max(times) - min(times))
-    avg_latency = int(mean(times))
-    entropy = len(set(codes)) if codes else 1
+    entropy = len({c for _, c, _ in seq if c is not None}) or 1
+
+    noisy = False
+    if len(times) == 3:
+        # the usual fake/real/fake sequence: one sort yields min, max and
+        # median, and the MAD of three is the smaller gap to the median
+        lo, med, hi = sorted(times)
+        delta = int(hi - lo)
+        avg_latency = int((lo + med + hi) / 3)
+        # jitter gate: one slow outlier among three (the real RCPT) keeps the
+        # MAD small; all three scattered means the delta is just noise
+        noisy = min(med - lo, hi - med) > TIMING_NOISE_RATIO * med
+    else:
+        # one or two samples (adaptive probing skips fake 2 once the real
+        # RCPT is clearly slower) are exempt: with two, the MAD is half the
+        # gap, so the gate would discard exactly the delay that ended probing
+        delta = int(max(times) - min(times))
+        avg_latency = int(sum(times) / len(times))
 
-    conf = 0.0
-    if delta > 120: conf += 0.25
-    elif delta > 80: conf += 0.18
-    elif delta > 40: conf += 0.12
-    elif delta > 10: conf += 0.06
+    # noise voids only the timing term; the reply-code bonus below stands
+    conf = 0.0 if noisy else _DELTA_CONF[bisect_left(_DELTA_BINS, delta)]
 
     if entropy > 1:
         conf += 0.05
@@ -233,16 +1142,25 @@ def analyze_timing(seq):
 # =========================
 def behavioral_score(fake1_t, fake2_t, real_t, confidence, entropy, provider, real_code):
 
-    if fake2_t is None:
-        fake2_t = fake1_t
+    # ENTERPRISE SMTP OVERRIDE (APPLE INCLUDED) — the RCPT code alone decides,
+    # so skip the timing maths entirely
+    if provider in ENTERPRISE_PROVIDERS:
+        verdict = ENTERPRISE_VERDICTS.get(real_code)
+        if verdict:
+            return dict(verdict)
+
+    # missing timings count as 0; a skipped fake2 mirrors fake1
+    fake1_t = fake1_t or 0
+    fake2_t = fake1_t if fake2_t is None else fake2_t or 0
+    real_t = real_t or 0
 
-    avg_fake = ((fake1_t or 0) + (fake2_t or 0)) / 2
-    gap_fakes = abs((fake1_t or 0) - (fake2_t or 0))
-    gap_real = abs((real_t or 0) - avg_fake)
+    avg_fake = (fake1_t + fake2_t) / 2
+    gap_fakes = abs(fake1_t - fake2_t)
+    gap_real = abs(real_t - avg_fake)
 
     if gap_fakes < 20 and gap_real < 20:
         pattern = "flat_pattern"
-    elif gap_real > 60 and (real_t or 0) > avg_fake:
+    elif gap_real > 60 and real_t > avg_fake:
         pattern = "strong_delay"
     elif gap_fakes < 25 and 20 <= gap_real <= 50:
         pattern = "semi_flat"
@@ -259,29 +1177,8 @@ def behavioral_score(fake1_t, fake2_t, real_t, confidence, entropy, provider, re
 
     # GOOGLE OVERRIDE
     if provider == "google":
-        if pattern == "strong_delay":
-            score = 90
-        elif pattern == "flat_pattern":
-            score = min(score, 40)
-        else:
-            score = max(score, 75)
-
-    # ENTERPRISE SMTP OVERRIDE (APPLE INCLUDED)
-    if provider in ["microsoft365", "proofpoint", "mimecast", "barracuda", "apple"]:
-        if real_code in (250, 450, 451, 452):
-            return {
-                "Pattern": "smtp_valid",
-                "Score": 99,
-                "Status": "valid",
-                "Deliverable": True
-            }
-        if real_code == 550:
-            return {
-                "Pattern": "smtp_550_invalid",
-                "Score": 10,
-                "Status": "invalid",
-                "Deliverable": False
-            }
+        lo, hi = GOOGLE_SCORE_BOUNDS.get(pattern, _GOOGLE_DEFAULT_BOUNDS)
+        score = min(max(score, lo), hi)
 
     if score >= 80:
         return {"Pattern": pattern, "Score": score, "Status": "valid", "Deliverable": True}
@@ -290,46 +1187,87 @@ def behavioral_score(fake1_t, fake2_t, real_t, confidence, entropy, provider, re
     return {"Pattern": pattern, "Score": score, "Status": "invalid", "Deliverable": False}
 
 # =========================
-# VERIFY SINGLE EMAIL
+# VERIFY STAGES
 # =========================
-def verify_email(email: str):
-    email = normalize_email(email)
+_RESULT_TEMPLATE = {
+    "email": None,
+    "Fake1_Code": None, "Fake1_Time": None,
+    "Real_Code": None, "Real_Time": None,
+    "Fake2_Code": None, "Fake2_Time": None,
+    "Timing_Delta": None, "Entropy": None,
+    "Avg_Latency": None, "Confidence": None,
+    "Provider": None, "Pattern": None,
+    "Status": "invalid", "Deliverable": False,
+    "Score": 0, "Reason": None,
+    "MX": None,
+}
 
-    result = {
-        "email": email,
-        "Fake1_Code": None, "Fake1_Time": None,
-        "Real_Code": None, "Real_Time": None,
-        "Fake2_Code": None, "Fake2_Time": None,
-        "Timing_Delta": None, "Entropy": None,
-        "Avg_Latency": None, "Confidence": None,
-        "Provider": None, "Pattern": None,
-        "Status": "invalid", "Deliverable": False,
-        "Score": 0, "Reason": None,
-        "MX": []
-    }
-
-    if not EMAIL_REGEX.match(email):
-        result["Reason"] = "bad_syntax"
-        return result
+def _new_result(email: str) -> dict:
+    # copy of a presized template; MX gets its own list per result
+    return dict(_RESULT_TEMPLATE, email=email, MX=[])
 
-    try:
-        domain = email.split("@")[1]
-        mx_records = resolve_mx(domain)
-        result["MX"] = mx_records
-        if not mx_records:
-            result["Reason"] = "no_mx"
-            return result
+def _mark_short_circuit(result: dict, reason: str) -> dict:
+    # disposable keeps the template's invalid verdict; a role mailbox is
+    # usually real, it just wasn't probed
+    if reason == "role_address":
+        result["Status"] = "unknown"
+    result["Reason"] = reason
+    return result
 
-        result["Provider"] = detect_mx_provider(mx_records[0])
+def _mark_mx_only(result: dict) -> dict:
+    # mode="fast": the domain has a mail host, but no mailbox was probed
+    result["Status"] = "unknown"
+    result["Reason"] = "mx_only"
+    return result
 
+def _resolve_mx_safe(domain: str) -> Tuple[List[str], Optional[Exception]]:
+    try:
+        return resolve_mx(domain), None
     except Exception as e:
-        result["Reason"] = f"mx_error:{e}"
-        return result
+        return [], e
+
+async def _resolve_mx_safe_async(domain: str) -> Tuple[List[str], Optional[Exception]]:
+    try:
+        return await resolve_mx_async(domain), None
+    except Exception as e:
+        return [], e
+
+async def _resolve_mx_many(domains: List[str], warm: bool = True) -> Dict[str, Tuple[List[str], Optional[Exception]]]:
+    """MX for every domain. With ``warm``, each new primary MX host's A
+    record is fetched as soon as its MX answer lands, overlapping with the
+    remaining MX queries, so batches start with the host IP already in the
+    shared resolver cache."""
+    # at most DNS_CONCURRENCY queries (UDP sockets) in flight at once
+    sem = asyncio.Semaphore(DNS_CONCURRENCY)
+    warmed = set()
 
-    mx = mx_records[0]
+    async def one(domain: str):
+        async with sem:
+            found = await _resolve_mx_safe_async(domain)
+            records = found[0]
+            if warm and records and records[0] not in warmed:
+                warmed.add(records[0])
+                await resolve_ipv4_host_async(records[0])
+            return found
 
-    seq = smtp_multi_probe(mx, email, adaptive=True)
+    found = await asyncio.gather(*(one(d) for d in domains))
+    return dict(zip(domains, found))
 
+def _apply_mx(result: dict, mx_records: List[str], error: Optional[Exception]) -> Optional[str]:
+    """Record the MX lookup on ``result``; return the MX host to probe, if any."""
+    if error is not None:
+        result["Reason"] = f"mx_error:{error}"
+        return None
+
+    result["MX"] = mx_records
+    if not mx_records:
+        result["Reason"] = "no_mx"
+        return None
+
+    result["Provider"] = detect_mx_provider(mx_records[0])
+    return mx_records[0]
+
+def _apply_probe(result: dict, seq) -> dict:
     if len(seq) > 0:
         result["Fake1_Code"], result["Fake1_Time"] = seq[0][1], seq[0][2]
     if len(seq) > 1:
@@ -358,28 +1296,225 @@ def verify_email(email: str):
     result["Reason"] = "pattern_analysis"
     return result
 
+# =========================
+# VERIFY SINGLE EMAIL
+# =========================
+def verify_email(email: str, mode: str = "full"):
+    """Verify one address. ``mode="fast"`` stops after the syntax,
+    disposable/role and MX checks and never opens an SMTP session."""
+    email = normalize_email(email)
+    result = _new_result(email)
+
+    m = match_email(email)
+    if not m:
+        result["Reason"] = "bad_syntax"
+        return result
+
+    # fast mode never reads the cache, so a cached SMTP verdict can't leak in
+    cached = mode != "fast" and result_cache.get(email)
+    if cached:
+        return cached
+
+    domain = m.group(2).lower()
+    reason = short_circuit_reason(m.group(1), domain)
+    if reason:
+        return _mark_short_circuit(result, reason)
+
+    mx = _apply_mx(result, *_resolve_mx_safe(domain))
+    if not mx:
+        return result
+    if mode == "fast":
+        return _mark_mx_only(result)
+
+    seq = smtp_multi_probe(mx, email, adaptive=True, domain=domain)
+    _apply_probe(result, seq)
+    result_cache.set(result)
+    return result
+
+async def verify_email_async(email: str, mode: str = "full"):
+    """Event-loop variant of verify_email: DNS and SMTP are both awaited."""
+    email = normalize_email(email)
+    result = _new_result(email)
+
+    m = match_email(email)
+    if not m:
+        result["Reason"] = "bad_syntax"
+        return result
+
+    # fast mode never reads the cache, so a cached SMTP verdict can't leak in
+    cached = mode != "fast" and result_cache.get(email)
+    if cached:
+        return cached
+
+    domain = m.group(2).lower()
+    reason = short_circuit_reason(m.group(1), domain)
+    if reason:
+        return _mark_short_circuit(result, reason)
+
+    mx = _apply_mx(result, *await _resolve_mx_safe_async(domain))
+    if not mx:
+        return result
+    if mode == "fast":
+        return _mark_mx_only(result)
+
+    seq = await smtp_multi_probe_async(mx, email, adaptive=True, domain=domain)
+    _apply_probe(result, seq)
+    result_cache.set(result)
+    return result
+
 # =========================
 # BULK VERIFY
 # =========================
-def verify_bulk_emails(emails, max_workers=MAX_WORKERS_DEFAULT):
-    emails = [normalize_email(e) for e in emails if EMAIL_REGEX.match(e or "")]
-    if not emails:
-        return []
+async def _probe_batch_async(mx: str, batch: List[dict]) -> List[dict]:
+    seqs = await smtp_batch_probe_async(mx, [r["email"] for r in batch], adaptive=True)
+    for r in batch:
+        _apply_probe(r, seqs[r["email"]])
+        result_cache.set(r)
+    return batch
+
+def _mark_error(batch: List[dict], e: Exception):
+    for r in batch:
+        r.update({
+            "Status": "error",
+            "Deliverable": False,
+            "Score": 0,
+            "Reason": f"exception:{e}",
+        })
+
+def _clean_bulk_input(emails) -> List[str]:
+    return [normalize_email(e) for e in emails if match_email(e or "")]
+
+_JOB_ORDER = itemgetter(0, 1)
 
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(verify_email, e): e for e in emails}
-        for f in as_completed(futures):
+def _plan_bulk(emails: List[str], mode: str = "full") -> Tuple[List[dict], List[Tuple[str, str, dict]]]:
+    """Split cleaned input into finished results (cached or short-circuited) and
+    (domain, email, result) jobs still to probe, one per address
+    case-insensitively. Jobs are in domain order so same-domain addresses
+    share a batch/session. Fast mode skips the result cache."""
+    seen = set()
+    ready: List[dict] = []
+    jobs: List[Tuple[str, str, dict]] = []
+    for e in emails:
+        key = e.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        hit = mode != "fast" and result_cache.get(e)
+        if hit:
+            ready.append(hit)
+            continue
+        at = e.rindex("@")
+        domain = e[at + 1:].lower()
+        reason = short_circuit_reason(e[:at], domain)
+        if reason:
+            ready.append(_mark_short_circuit(_new_result(e), reason))
+        else:
+            jobs.append((domain, e, _new_result(e)))
+
+    jobs.sort(key=_JOB_ORDER)
+    return ready, jobs
+
+def _bucket_by_mx(jobs, mx_lookup) -> Tuple[List[dict], List[Tuple[str, List[dict]]]]:
+    """Apply MX lookups; return (results with no MX to probe, per-MX batches)."""
+    failed: List[dict] = []
+    groups: Dict[str, List[dict]] = defaultdict(list)
+    for domain, _, result in jobs:
+        mx = _apply_mx(result, *mx_lookup[domain])
+        if mx:
+            groups[mx].append(result)
+        else:
+            failed.append(result)
+
+    # round-robin across hosts so one big MX doesn't take every early slot
+    per_host = [
+        [(mx, batch[i:i + SMTP_BATCH_SIZE]) for i in range(0, len(batch), SMTP_BATCH_SIZE)]
+        for mx, batch in groups.items()
+    ]
+    batches = [b for rnd in zip_longest(*per_host) for b in rnd if b is not None]
+    return failed, batches
+
+async def iter_verify_bulk_emails(emails, max_workers=MAX_WORKERS_DEFAULT, ordered=False,
+                                  mode="full") -> AsyncIterator[dict]:
+    """Yield one result per unique address, in completion order; with
+    ``ordered``, one per valid input address in input order instead."""
+    emails = _clean_bulk_input(emails)
+    bulk = _iter_bulk(emails, max_workers, mode)
+    results = _in_input_order(emails, bulk) if ordered else bulk
+    try:
+        async for r in results:
+            yield r
+    finally:
+        # close both now if the consumer stops early, so _iter_bulk cancels
+        # its in-flight batches instead of waiting for the GC
+        await results.aclose()
+        await bulk.aclose()
+
+async def _in_input_order(emails: List[str], results: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    # release each input row as soon as it and everything before it is done;
+    # case-variant duplicates share a result but each row echoes its own address
+    done: Dict[str, dict] = {}
+    rows = iter(emails)
+    email = next(rows, None)
+    async for r in results:
+        done[r["email"].lower()] = r
+        while email is not None and email.lower() in done:
+            yield dict(done[email.lower()], email=email)
+            email = next(rows, None)
+
+async def _iter_bulk(emails: List[str], max_workers: int, mode: str = "full") -> AsyncIterator[dict]:
+    # ``emails`` is already cleaned (_clean_bulk_input)
+    ready, jobs = _plan_bulk(emails, mode)
+    for r in ready:
+        yield r
+    if not jobs:
+        return
+
+    # 1) MX for every unique domain, concurrently (warms mx_cache and the
+    #    MX hosts' A records)
+    mx_lookup = await _resolve_mx_many(list({domain for domain, _, _ in jobs}), warm=mode != "fast")
+
+    # 2) bucket by primary MX so each host gets one SMTP session per batch
+    failed, batches = _bucket_by_mx(jobs, mx_lookup)
+    for r in failed:
+        yield r
+    if mode == "fast":
+        for _, batch in batches:
+            for r in batch:
+                yield _mark_mx_only(r)
+        return
+
+    # 3) batches are coroutines: up to max_workers * ASYNC_CONCURRENCY_FACTOR
+    #    sessions at once, without a thread each; yielded as each finishes
+    sem = asyncio.Semaphore(max_workers * ASYNC_CONCURRENCY_FACTOR)
+
+    async def run(mx: str, batch: List[dict]) -> List[dict]:
+        async with sem:
             try:
-                results.append(f.result())
+                await _probe_batch_async(mx, batch)
             except Exception as e:
-                results.append({
-                    "email": futures[f],
-                    "Status": "error",
-                    "Deliverable": False,
-                    "Score": 0,
-                    "Reason": f"exception:{e}",
-                })
-
-    lookup = {r["email"]: r for r in results}
-    return [lookup[e] for e in emails if e in lookup]
+                _mark_error(batch, e)
+        return batch
+
+    tasks = [asyncio.ensure_future(run(mx, b)) for mx, b in batches]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for r in await finished:
+                yield r
+    finally:
+        # the consumer went away (client disconnect): stop probing
+        for task in tasks:
+            task.cancel()
+
+async def verify_bulk_emails_async(emails, max_workers=MAX_WORKERS_DEFAULT, mode="full"):
+    """All results at once, one per valid input address in input order."""
+    return [r async for r in iter_verify_bulk_emails(emails, max_workers, ordered=True, mode=mode)]
+
+def verify_bulk_emails(emails, max_workers=MAX_WORKERS_DEFAULT, mode="full"):
+    """verify_bulk_emails_async for callers without a running event loop."""
+    async def run():
+        try:
+            return await verify_bulk_emails_async(emails, max_workers, mode)
+        finally:
+            async_smtp_pool.close_all()  # its streams die with this loop
+
+    return asyncio.run(run())
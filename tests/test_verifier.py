@@ -0,0 +1,721 @@
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import dns.exception
+import dns.resolver
+
+from app import verifier
+
+
+def _fake_mx(domain):
+    return ["mx.example.net"]
+
+
+class FastModeCacheTest(unittest.TestCase):
+    def setUp(self):
+        verifier.result_cache._store.clear()
+        self.addCleanup(verifier.result_cache._store.clear)
+        patcher = mock.patch.object(verifier, "resolve_mx", _fake_mx)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _prime(self, email):
+        full = verifier._new_result(email)
+        full.update(Status="valid", Deliverable=True, Score=99, Real_Code=250, Reason="pattern_analysis")
+        verifier.result_cache.set(full)
+        self.assertEqual(verifier.result_cache.get(email)["Reason"], "pattern_analysis")
+
+    def test_fast_mode_ignores_cached_full_verdict(self):
+        self._prime("user@example.com")
+        result = verifier.verify_email("user@example.com", mode="fast")
+        self.assertEqual(result["Reason"], "mx_only")
+        self.assertEqual(result["Status"], "unknown")
+
+    def test_fast_mode_async_ignores_cached_full_verdict(self):
+        self._prime("user@example.com")
+
+        async def fake_mx_async(domain):
+            return _fake_mx(domain)
+
+        with mock.patch.object(verifier, "resolve_mx_async", fake_mx_async):
+            result = asyncio.run(verifier.verify_email_async("user@example.com", mode="fast"))
+        self.assertEqual(result["Reason"], "mx_only")
+
+    def test_fast_mode_bulk_ignores_cached_full_verdict(self):
+        self._prime("user@example.com")
+        ready, jobs = verifier._plan_bulk(["user@example.com"], mode="fast")
+        self.assertEqual(ready, [])
+        self.assertEqual([email for _, email, _ in jobs], ["user@example.com"])
+
+    def test_full_mode_still_uses_cache(self):
+        self._prime("user@example.com")
+        result = verifier.verify_email("user@example.com")
+        self.assertEqual(result["Reason"], "pattern_analysis")
+
+
+class BulkRowEmailTest(unittest.TestCase):
+    def setUp(self):
+        async def fake_mx_async(domain):
+            return _fake_mx(domain)
+
+        patcher = mock.patch.object(verifier, "resolve_mx_async", fake_mx_async)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_case_variants_echo_their_own_address(self):
+        emails = ["A@example.com", "a@example.com"]
+        rows = verifier.verify_bulk_emails(emails, mode="fast")
+        self.assertEqual([r["email"] for r in rows], emails)
+
+    def test_case_variants_echo_their_own_address_async(self):
+        emails = ["A@example.com", "a@example.com"]
+        rows = asyncio.run(verifier.verify_bulk_emails_async(emails, mode="fast"))
+        self.assertEqual([r["email"] for r in rows], emails)
+
+
+class ResultCacheTest(unittest.TestCase):
+    def _result(self, code):
+        result = verifier._new_result("user@example.com")
+        result.update(Real_Code=code, Reason="pattern_analysis")
+        return result
+
+    def test_transient_replies_are_not_cached(self):
+        cache = verifier.ResultCache()
+        for code in (421, 450, 451, 452):
+            cache.set(self._result(code))
+            self.assertIsNone(cache.get("user@example.com"), code)
+
+    def test_definitive_replies_are_cached(self):
+        for code in (250, 550):
+            cache = verifier.ResultCache()
+            cache.set(self._result(code))
+            self.assertEqual(cache.get("user@example.com")["Real_Code"], code)
+
+
+class MXCachePersistenceTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "mx.sqlite")
+
+    def _written(self, cache):
+        # the write-through runs on the cache's writer thread
+        cache._writer.shutdown(wait=True)
+
+    def test_entries_survive_a_restart(self):
+        first = verifier.MXCache(path=self.path)
+        first.set("example.com", ["mx1.example.net", "mx2.example.net"])
+        first.set_negative("nx.example", "NXDOMAIN")
+        self._written(first)
+
+        second = verifier.MXCache(path=self.path)
+        self.assertEqual(second.get("example.com"), ["mx1.example.net", "mx2.example.net"])
+        with self.assertRaises(verifier.MXLookupError):
+            second.get("nx.example")
+
+    def test_get_async_reads_the_file(self):
+        first = verifier.MXCache(path=self.path)
+        first.set("example.com", ["mx1.example.net"])
+        self._written(first)
+
+        second = verifier.MXCache(path=self.path)
+        self.assertEqual(asyncio.run(second.get_async("example.com")), ["mx1.example.net"])
+        self.assertIsNone(asyncio.run(second.get_async("other.example")))
+
+
+class ConcurrentStreamTest(unittest.TestCase):
+    """Two /bulk/stream runs at once with different max_workers."""
+
+    def setUp(self):
+        async def fake_mx_async(domain):
+            return ["mx." + domain]
+
+        async def fake_ip_async(host):
+            return "192.0.2.1"
+
+        async def fake_batch_probe(mx, emails, adaptive=True):
+            await asyncio.sleep(0.01)
+            return {e: [("f1", 550, 10.0), ("real", 250, 90.0)] for e in emails}
+
+        for name, value in (
+            ("resolve_mx_async", fake_mx_async),
+            ("resolve_ipv4_host_async", fake_ip_async),
+            ("smtp_batch_probe_async", fake_batch_probe),
+            ("result_cache", verifier.ResultCache()),
+        ):
+            patcher = mock.patch.object(verifier, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _emails(self, tag, n):
+        return [f"{tag}{i}@d{i}.example" for i in range(n)]
+
+    def test_concurrent_streams_with_different_pool_sizes(self):
+        async def collect(emails, max_workers):
+            return [r async for r in verifier.iter_verify_bulk_emails(emails, max_workers=max_workers)]
+
+        async def both():
+            return await asyncio.gather(collect(self._emails("a", 60), 2),
+                                        collect(self._emails("b", 60), 50))
+
+        for rows in asyncio.run(both()):
+            self.assertEqual(len(rows), 60)
+            self.assertEqual({r["Reason"] for r in rows}, {"pattern_analysis"})
+
+    def test_stopping_a_stream_cancels_its_batches(self):
+        cancelled = []
+
+        async def batch_probe(mx, emails, adaptive=True):
+            if mx != "mx.d0.example":
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(mx)
+                    raise
+            return {e: [("f1", 550, 10.0), ("real", 250, 90.0)] for e in emails}
+
+        async def first_row():
+            stream = verifier.iter_verify_bulk_emails(self._emails("c", 5))
+            try:
+                return await stream.__anext__()
+            finally:
+                await stream.aclose()
+
+        with mock.patch.object(verifier, "smtp_batch_probe_async", batch_probe):
+            row = asyncio.run(first_row())
+        self.assertEqual(row["email"], "c0@d0.example")
+        self.assertEqual(len(cancelled), 4)
+
+
+class ShortCircuitTest(unittest.TestCase):
+    def test_disposable_is_invalid(self):
+        result = verifier.verify_email("someone@mailinator.com")
+        self.assertEqual((result["Status"], result["Reason"]), ("invalid", "disposable"))
+
+    def test_skipped_role_address_is_unknown(self):
+        with mock.patch.object(verifier, "SKIP_ROLE_ADDRESSES", True):
+            result = verifier.verify_email("info@gmail.com")
+            rows = verifier.verify_bulk_emails(["Support@gmail.com"])
+        self.assertEqual((result["Status"], result["Reason"]), ("unknown", "role_address"))
+        self.assertFalse(result["Deliverable"])
+        self.assertEqual([(r["Status"], r["Reason"]) for r in rows], [("unknown", "role_address")])
+
+
+class AnalyzeTimingTest(unittest.TestCase):
+    def test_noisy_timings_keep_the_entropy_bonus(self):
+        seq = [("f1", 550, 5.0), ("real", 250, 12.0), ("f2", 550, 20.0)]
+        self.assertEqual(verifier.analyze_timing(seq), (0.05, 15, 2, 12))
+
+    def test_noisy_timings_without_code_variety_score_zero(self):
+        seq = [("f1", 550, 5.0), ("real", 550, 12.0), ("f2", 550, 20.0)]
+        self.assertEqual(verifier.analyze_timing(seq)[0], 0.0)
+
+    def test_one_slow_real_rcpt_is_not_noise(self):
+        seq = [("f1", 550, 40.0), ("real", 250, 200.0), ("f2", 550, 42.0)]
+        self.assertEqual(verifier.analyze_timing(seq), (0.3, 160, 2, 94))
+
+    def test_two_samples_skip_the_gate(self):
+        seq = [("f1", 550, 50.0), ("real", 250, 200.0)]
+        self.assertEqual(verifier.analyze_timing(seq), (0.3, 150, 2, 125))
+
+
+class ProbeErrorHandlingTest(unittest.TestCase):
+    """Network failures become __connect__; programming errors propagate."""
+
+    def setUp(self):
+        patcher = mock.patch.object(verifier, "resolve_ipv4_host", lambda host: "192.0.2.1")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = mock.Mock()
+        patcher = mock.patch.object(verifier, "smtp_pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _probe_raising(self, exc):
+        with mock.patch.object(verifier, "_probe_sequence", side_effect=exc):
+            return verifier.smtp_multi_probe("mx.example.net", "user@example.com")
+
+    def test_network_errors_are_connect_failures(self):
+        for exc in (OSError("reset"), TimeoutError(), verifier.smtplib.SMTPServerDisconnected()):
+            self.assertEqual(self._probe_raising(exc), [("__connect__", None, None)])
+        self.pool.release.assert_called_with("mx.example.net", mock.ANY, healthy=False)
+
+    def test_programming_errors_propagate(self):
+        with self.assertRaises(TypeError):
+            self._probe_raising(TypeError("bug"))
+
+    def test_connect_failure(self):
+        self.pool.acquire.side_effect = ConnectionRefusedError()
+        self.assertEqual(verifier.smtp_multi_probe("mx.example.net", "user@example.com"),
+                         [("__connect__", None, None)])
+
+    def test_batch_programming_errors_propagate(self):
+        async def fake_ip_async(host):
+            return "192.0.2.1"
+
+        async def fake_open(mx_ip):
+            return mock.Mock(probes=0)
+
+        with mock.patch.object(verifier, "resolve_ipv4_host_async", fake_ip_async), \
+                mock.patch.object(verifier._AsyncSession, "open", fake_open), \
+                mock.patch.object(verifier, "_async_probe_sequence", side_effect=TypeError("bug")):
+            with self.assertRaises(TypeError):
+                asyncio.run(verifier.smtp_batch_probe_async("mx.example.net", ["user@example.com"]))
+
+
+class _FakeSession:
+    """Stands in for _AsyncSession: RSET answers 250 unless ``dead``."""
+
+    def __init__(self, dead=False):
+        self.probes = 0
+        self.dead = dead
+        self.closed = False
+
+    async def command(self, line):
+        if self.dead:
+            raise ConnectionResetError()
+        return 250
+
+    def close(self, polite=True):
+        self.closed = True
+
+
+class AsyncSMTPPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.opened = []
+
+        async def fake_open(mx_ip):
+            session = _FakeSession()
+            self.opened.append(session)
+            return session
+
+        patcher = mock.patch.object(verifier._AsyncSession, "open", fake_open)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sessions_are_reused_across_acquires(self):
+        pool = verifier.AsyncSMTPPool(max_idle_per_host=2, idle_ttl=100)
+
+        async def go():
+            first = await pool.acquire("mx", "192.0.2.1")
+            pool.release("mx", first)
+            second = await pool.acquire("mx", "192.0.2.1")
+            return first, second
+
+        first, second = asyncio.run(go())
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_dead_or_stale_sessions_are_replaced(self):
+        pool = verifier.AsyncSMTPPool(max_idle_per_host=2, idle_ttl=100)
+
+        async def go():
+            dead = _FakeSession(dead=True)
+            pool.release("mx", dead)
+            fresh = await pool.acquire("mx", "192.0.2.1")
+            stale = _FakeSession()
+            pool._hosts()["mx"].append((time.monotonic() - 500, stale))
+            again = await pool.acquire("mx", "192.0.2.1")
+            return dead, fresh, stale, again
+
+        dead, fresh, stale, again = asyncio.run(go())
+        self.assertTrue(dead.closed)
+        self.assertTrue(stale.closed)
+        self.assertIsNot(again, stale)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_unhealthy_or_worn_sessions_are_not_kept(self):
+        pool = verifier.AsyncSMTPPool(max_idle_per_host=2, idle_ttl=100)
+
+        async def go():
+            sick, worn = _FakeSession(), _FakeSession()
+            worn.probes = verifier.MAX_PROBES_PER_SESSION
+            pool.release("mx", sick, healthy=False)
+            pool.release("mx", worn)
+            return sick, worn, dict(pool._hosts())
+
+        sick, worn, hosts = asyncio.run(go())
+        self.assertTrue(sick.closed and worn.closed)
+        self.assertFalse(hosts.get("mx"))
+
+    def test_reap_closes_idle_sessions_on_every_host(self):
+        pool = verifier.AsyncSMTPPool(max_idle_per_host=2, idle_ttl=100)
+
+        async def go():
+            old, live = _FakeSession(), _FakeSession()
+            pool._hosts()["a"].append((time.monotonic() - 500, old))
+            pool._hosts()["b"].append((time.monotonic(), live))
+            pool.reap()
+            return old, live, dict(pool._hosts())
+
+        old, live, hosts = asyncio.run(go())
+        self.assertTrue(old.closed)
+        self.assertFalse(live.closed)
+        self.assertEqual(list(hosts), ["b"])
+
+    def test_single_verifications_share_one_connection(self):
+        async def fake_mx_async(domain):
+            return ["mx.example.net"]
+
+        async def fake_ip_async(host):
+            return "192.0.2.1"
+
+        async def fake_sequence(session, mx, target, adaptive=True, reset=False, domain=None):
+            return [("f1", 550, 10.0), (target, 250, 90.0)]
+
+        async def go():
+            for i in range(3):
+                await verifier.verify_email_async(f"user{i}@example.com")
+
+        with mock.patch.object(verifier, "resolve_mx_async", fake_mx_async), \
+                mock.patch.object(verifier, "resolve_ipv4_host_async", fake_ip_async), \
+                mock.patch.object(verifier, "_async_probe_sequence", fake_sequence), \
+                mock.patch.object(verifier, "result_cache", verifier.ResultCache()), \
+                mock.patch.object(verifier, "async_smtp_pool", verifier.AsyncSMTPPool()):
+            asyncio.run(go())
+        self.assertEqual(len(self.opened), 1)
+
+
+class _StubResolver:
+    """Async resolver whose resolve() waits ``delay`` (or for ``gate``), then
+    returns ``answer`` or raises it if it is an exception."""
+
+    def __init__(self, answer, delay=0.0, gate=None):
+        self.answer, self.delay, self.gate = answer, delay, gate
+        self.calls = 0
+        self.cancelled = False
+
+    async def resolve(self, domain, rdtype):
+        self.calls += 1
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.answer, BaseException):
+            raise self.answer
+        return self.answer
+
+
+class HedgedMXQueryTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(verifier, "DNS_HEDGE_DELAY", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, primary, alt):
+        with mock.patch.object(verifier, "_aresolver", primary), \
+                mock.patch.object(verifier, "_aresolver_alt", alt):
+            return asyncio.run(verifier._hedged_mx_query("example.com"))
+
+    def test_primary_answers_before_the_hedge(self):
+        primary, alt = _StubResolver("primary"), _StubResolver("alt")
+        self.assertEqual(self._run(primary, alt), "primary")
+        self.assertEqual(alt.calls, 0)
+
+    def test_hedge_wins_and_primary_is_cancelled(self):
+        primary, alt = _StubResolver("primary", delay=5), _StubResolver("alt")
+        self.assertEqual(self._run(primary, alt), "alt")
+        self.assertTrue(primary.cancelled)
+
+    def test_both_finish_in_one_round(self):
+        async def go():
+            gate = asyncio.Event()
+            primary = _StubResolver(dns.exception.Timeout(), gate=gate)
+            alt = _StubResolver("alt", gate=gate)
+            asyncio.get_running_loop().call_later(0.1, gate.set)
+            with mock.patch.object(verifier, "_aresolver", primary), \
+                    mock.patch.object(verifier, "_aresolver_alt", alt):
+                return await verifier._hedged_mx_query("example.com")
+
+        for _ in range(5):
+            self.assertEqual(asyncio.run(go()), "alt")
+
+    def test_transient_failure_then_answer(self):
+        primary = _StubResolver(dns.exception.Timeout(), delay=0.08)
+        alt = _StubResolver("alt", delay=0.1)
+        self.assertEqual(self._run(primary, alt), "alt")
+
+    def test_nxdomain_short_circuits_and_cancels_the_hedge(self):
+        primary = _StubResolver(dns.resolver.NXDOMAIN(), delay=0.08)
+        alt = _StubResolver("alt", delay=5)
+        with self.assertRaises(dns.resolver.NXDOMAIN):
+            self._run(primary, alt)
+        self.assertTrue(alt.cancelled)
+
+    def test_transient_failure_on_both_raises(self):
+        primary = _StubResolver(dns.exception.Timeout(), delay=0.08)
+        alt = _StubResolver(dns.exception.Timeout(), delay=0.1)
+        with self.assertRaises(dns.exception.Timeout):
+            self._run(primary, alt)
+
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MXRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch.object(verifier.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = verifier.MXRateLimiter(rate=10.0, min_rate=2.0)
+
+    def _drain(self, mx="mx.example.net"):
+        return [self.limiter.reserve(mx) for _ in range(10)]
+
+    def test_full_bucket_then_wait_for_the_next_token(self):
+        self.assertEqual(self._drain(), [0.0] * 10)
+        self.assertAlmostEqual(self.limiter.reserve("mx.example.net"), 0.1)
+
+    def test_tokens_refill_with_time(self):
+        self._drain()
+        self.clock.now += 0.5
+        self.assertEqual([self.limiter.reserve("mx.example.net") for _ in range(5)], [0.0] * 5)
+        self.assertGreater(self.limiter.reserve("mx.example.net"), 0.0)
+
+    def test_refill_is_capped_at_the_rate(self):
+        self._drain()
+        self.clock.now += 60
+        self.assertEqual(self._drain(), [0.0] * 10)
+        self.assertGreater(self.limiter.reserve("mx.example.net"), 0.0)
+
+    def test_transient_reply_halves_the_rate_and_empties_the_bucket(self):
+        self.limiter.reserve("mx.example.net")
+        self.limiter.feedback("mx.example.net", 451)
+        # 1 token at the halved 5/s rate
+        self.assertAlmostEqual(self.limiter.reserve("mx.example.net"), 0.2)
+
+    def test_rate_never_drops_below_min_rate(self):
+        self.limiter.reserve("mx.example.net")
+        for code in (421, 450, 451, 452, 451):
+            self.limiter.feedback("mx.example.net", code)
+        self.assertEqual(self.limiter._buckets["mx.example.net"][0], 2.0)
+
+    def test_accepted_replies_recover_additively_up_to_the_rate(self):
+        self.limiter.reserve("mx.example.net")
+        self.limiter.feedback("mx.example.net", 450)
+        rates = []
+        for _ in range(7):
+            self.limiter.feedback("mx.example.net", 250)
+            rates.append(self.limiter._buckets["mx.example.net"][0])
+        self.assertEqual(rates, [6.0, 7.0, 8.0, 9.0, 10.0, 10.0, 10.0])
+
+    def test_other_replies_leave_the_bucket_alone(self):
+        self.limiter.reserve("mx.example.net")
+        before = list(self.limiter._buckets["mx.example.net"])
+        for code in (None, 550, 503):
+            self.limiter.feedback("mx.example.net", code)
+        self.limiter.feedback("other.example.net", 451)
+        self.assertEqual(self.limiter._buckets["mx.example.net"], before)
+        self.assertNotIn("other.example.net", self.limiter._buckets)
+
+
+class StaleMXTest(unittest.TestCase):
+    def setUp(self):
+        # ttl=-1 stores every answer already expired, inside the stale window
+        self.cache = verifier.MXCache(ttl=-1, stale_ttl=60)
+        self.cache.set("example.com", ["mx.example.net"])
+
+    def test_only_the_first_caller_refreshes(self):
+        self.assertIsNone(self.cache.get("example.com"))
+        self.assertEqual(self.cache.get_stale("example.com"), (["mx.example.net"], True))
+        self.assertEqual(self.cache.get_stale("example.com"), (["mx.example.net"], False))
+        self.cache.refresh_done("example.com")
+        self.assertEqual(self.cache.get_stale("example.com"), (["mx.example.net"], True))
+
+    def test_negative_or_aged_out_entries_are_not_served(self):
+        self.cache.set_negative("nx.example", "NXDOMAIN", ttl=-1)
+        self.assertEqual(self.cache.get_stale("nx.example"), (None, False))
+        self.assertEqual(self.cache.get_stale("missing.example"), (None, False))
+        self.cache._store["example.com"] = (time.time() - 61, ["mx.example.net"])
+        self.assertEqual(self.cache.get_stale("example.com"), (None, False))
+
+    def test_serve_stale_submits_one_refresh(self):
+        refresher = mock.Mock()
+        with mock.patch.object(verifier, "mx_cache", self.cache), \
+                mock.patch.object(verifier, "_mx_refresher", refresher):
+            served = [verifier._serve_stale_mx("example.com") for _ in range(5)]
+            self.assertEqual(served, [["mx.example.net"]] * 5)
+            refresher.submit.assert_called_once_with(verifier._refresh_mx, "example.com")
+
+            with mock.patch.object(verifier, "_lookup_mx", side_effect=verifier.MXLookupError("SERVFAIL")):
+                verifier._refresh_mx("example.com")
+            verifier._serve_stale_mx("example.com")
+        self.assertEqual(refresher.submit.call_count, 2)
+
+
+def _reference_analyze_timing(seq):
+    """analyze_timing as originally written (elif ladder, statistics.median),
+    plus the jitter gate on three samples."""
+    times = [t for _, _, t in seq if isinstance(t, (int, float))]
+    codes = [str(c) for _, c, _ in seq if c is not None]
+    if not times:
+        return 0.0, 0, 1, None
+
+    delta = int(max(times) - min(times))
+    avg_latency = int(statistics.mean(times))
+    entropy = len(set(codes)) if codes else 1
+
+    conf = 0.0
+    if delta > 120: conf += 0.25
+    elif delta > 80: conf += 0.18
+    elif delta > 40: conf += 0.12
+    elif delta > 10: conf += 0.06
+
+    if len(times) == 3:
+        med = statistics.median(times)
+        if statistics.median(abs(t - med) for t in times) > verifier.TIMING_NOISE_RATIO * med:
+            conf = 0.0
+
+    if entropy > 1:
+        conf += 0.05
+    return round(min(conf, 0.35), 2), delta, entropy, avg_latency
+
+
+def _reference_behavioral_score(fake1_t, fake2_t, real_t, confidence, entropy, provider, real_code):
+    """behavioral_score as originally written: inline "or 0" everywhere and
+    if/elif override ladders."""
+    if fake2_t is None:
+        fake2_t = fake1_t
+
+    avg_fake = ((fake1_t or 0) + (fake2_t or 0)) / 2
+    gap_fakes = abs((fake1_t or 0) - (fake2_t or 0))
+    gap_real = abs((real_t or 0) - avg_fake)
+
+    if gap_fakes < 20 and gap_real < 20:
+        pattern = "flat_pattern"
+    elif gap_real > 60 and (real_t or 0) > avg_fake:
+        pattern = "strong_delay"
+    elif gap_fakes < 25 and 20 <= gap_real <= 50:
+        pattern = "semi_flat"
+    else:
+        pattern = "unclear"
+
+    base = (
+        min(gap_real / 80, 1.0) * 40 +
+        (1 - min(gap_fakes / 100, 1.0)) * 20 +
+        min(confidence / 0.35, 1.0) * 20 +
+        min(entropy / 3, 1.0) * 10
+    )
+    score = min(99, round(base, 2))
+
+    if provider == "google":
+        if pattern == "strong_delay":
+            score = 90
+        elif pattern == "flat_pattern":
+            score = min(score, 40)
+        else:
+            score = max(score, 75)
+
+    if provider in ["microsoft365", "proofpoint", "mimecast", "barracuda", "apple"]:
+        if real_code in (250, 450, 451, 452):
+            return {"Pattern": "smtp_valid", "Score": 99, "Status": "valid", "Deliverable": True}
+        if real_code == 550:
+            return {"Pattern": "smtp_550_invalid", "Score": 10, "Status": "invalid", "Deliverable": False}
+
+    if score >= 80:
+        return {"Pattern": pattern, "Score": score, "Status": "valid", "Deliverable": True}
+    if score >= 55:
+        return {"Pattern": pattern, "Score": score, "Status": "risky", "Deliverable": False}
+    return {"Pattern": pattern, "Score": score, "Status": "invalid", "Deliverable": False}
+
+
+class RefactorEquivalenceTest(unittest.TestCase):
+    """The table/bisect/single-sort rewrites agree with the original code."""
+
+    def test_delta_ladder_boundaries(self):
+        for delta in range(200):
+            seq = [("f1", 550, 100.0), ("real", 550, 100.0 + delta)]
+            self.assertEqual(verifier.analyze_timing(seq), _reference_analyze_timing(seq), delta)
+
+    def test_analyze_timing_matches_reference(self):
+        rnd = random.Random(1234)
+        codes = (None, 250, 450, 550)
+        for _ in range(20000):
+            seq = [
+                (f"a{i}", rnd.choice(codes), rnd.choice((None, round(rnd.uniform(0, 400), 2))))
+                for i in range(rnd.randint(0, 3))
+            ]
+            self.assertEqual(verifier.analyze_timing(seq), _reference_analyze_timing(seq), seq)
+
+    def test_behavioral_score_matches_reference(self):
+        timings = (None, 0, 5.0, 30.0, 55.5, 90.0, 200.0)
+        providers = ("google", "microsoft365", "apple", "yahoo", "unknown")
+        for f1, f2, real in itertools.product(timings, repeat=3):
+            for conf, entropy in ((0.0, 1), (0.18, 2), (0.35, 3)):
+                for provider in providers:
+                    for code in (None, 250, 451, 550):
+                        args = (f1, f2, real, conf, entropy, provider, code)
+                        self.assertEqual(verifier.behavioral_score(*args),
+                                         _reference_behavioral_score(*args), args)
+
+
+class _ScriptedSession:
+    """_AsyncSession stand-in whose RCPTs reply from a script of (code, ms)."""
+
+    pipelining = False
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.commands = []
+
+    async def command(self, line):
+        self.commands.append(line)
+        return 250
+
+    async def timed_rcpt(self, mx, addr):
+        code, ms = self.script.pop(0)
+        return addr, code, ms
+
+
+class ProbeSequenceTest(unittest.TestCase):
+    CASES = [
+        # (fake1, real), adaptive -> probes sent
+        (((550, 20.0), (250, 100.0)), True, 2),   # accepted and clearly slower
+        (((550, 20.0), (250, 60.0)), True, 3),    # not slow enough
+        (((550, 20.0), (550, 200.0)), True, 3),   # rejected
+        (((550, 200.0), (451, 20.0)), True, 2),   # greylisted counts as accepted
+        (((550, 20.0), (250, 100.0)), False, 3),  # adaptive off
+    ]
+
+    def test_async_sequence_length(self):
+        for (fake1, real), adaptive, expected in self.CASES:
+            session = _ScriptedSession([fake1, real, (550, 21.0)])
+            seq = asyncio.run(verifier._async_probe_sequence(
+                session, "mx.example.net", "user@example.com", adaptive=adaptive, reset=True))
+            self.assertEqual(len(seq), expected, (fake1, real, adaptive))
+            self.assertEqual(seq[1], ("user@example.com",) + real)
+            self.assertEqual(session.commands[0], "RSET")
+
+    def test_sync_sequence_length(self):
+        smtp = mock.Mock()
+        smtp.has_extn.return_value = False
+        for (fake1, real), adaptive, expected in self.CASES:
+            script = [fake1, real, (550, 21.0)]
+            with mock.patch.object(verifier, "_timed_rcpt",
+                                   side_effect=lambda s, mx, addr: (addr,) + script.pop(0)):
+                seq = verifier._probe_sequence(smtp, "mx.example.net", "user@example.com",
+                                               adaptive=adaptive)
+            self.assertEqual(len(seq), expected, (fake1, real, adaptive))
+            self.assertEqual(seq[1], ("user@example.com",) + real)
+
+
+if __name__ == "__main__":
+    unittest.main()